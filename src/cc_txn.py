@@ -1,7 +1,6 @@
 from collections import namedtuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from zoneinfo import ZoneInfo
 
 """A namedtuple to represent and combine the two important attributes
 of a Credit Card transaction:
@@ -12,23 +11,30 @@ of a Credit Card transaction:
 CurrencyAmountTuple = namedtuple("CurrencyAmountTuple", ["currency", "amount"])
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CreditCardTxnDC:
     """A DataClass representing a Credit Card transaction and
     its associated details.
-    """
 
-    # TODO:
-    #   - this definition should move out to common.py
-    DEFAULT_TZ = ZoneInfo("Asia/Karachi")
-    """
-    The default timezone used for the Txn date.
+    slots=True drops the per-instance __dict__ (a significant memory
+    saving when a backup file yields thousands of txns) and frozen=True
+    keeps parsed txns immutable.
     """
 
     amountTuple: CurrencyAmountTuple
     date: datetime
     vendor: str
     ccLastFourDigits: int = 0
+    monthKey: tuple = field(init=False)
+    """
+    The (year, month) the Txn falls in, precomputed once at
+    construction so aggregation loops don't re-derive it per access.
+    """
+
+    def __post_init__(self):
+        # object.__setattr__ is needed to initialize a derived field on
+        # a frozen dataclass
+        object.__setattr__(self, "monthKey", (self.date.year, self.date.month))
 
     def __repr__(self) -> str:
         """Custom/overridden __repr__ function for the CreditCardTxnDC data class
@@ -7,7 +7,7 @@ from time import perf_counter
 import click
 
 from cc_txn import CreditCardTxnDC
-from common import Currency
+from common import DEFAULT_TZ, Currency
 from sms_backup_file_parser import SmsBackupFileParser
 
 # the global instance of the SMS backup msgs file parser
@@ -52,9 +52,18 @@ def list_all_vendors():
         f"Found {len(smsParser.ccVendors)} unique Vendors from parsed HBL SMS messages:"
     )
 
+    # build the output in one go: a single echo is far cheaper than one
+    # formatted-and-flushed write per vendor. ccVendors is kept sorted
+    # incrementally when sortedcontainers is installed, in which case
+    # this sorted() is a single linear pass over already-ordered input;
+    # it also covers the plain-set fallback
     sorted_vendors = sorted(smsParser.ccVendors)
-    for index, vendor in enumerate(sorted_vendors, start=1):
-        click.echo(f"Vendor {index}: [{vendor}]")
+    click.echo(
+        "\n".join(
+            f"Vendor {index}: [{vendor}]"
+            for index, vendor in enumerate(sorted_vendors, start=1)
+        )
+    )
 
 
 @cli.command()
@@ -64,50 +73,96 @@ def list_all_cc_txns():
         f"Found {len(smsParser.ccTxns)} HBL CC transactions from parsed HBL SMS messages:"
     )
     print()
-    for index, txn in enumerate(smsParser.ccTxns, start=1):
-        click.echo(f"{index}: {txn}")
+    click.echo(
+        "\n".join(
+            f"{index}: {txn}"
+            for index, txn in enumerate(smsParser.ccTxns, start=1)
+        )
+    )
+
+
+@cli.command()
+@click.option(
+    "--start-date",
+    "start_date",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    required=True,
+    help="start of the date range (inclusive), e.g. 2023-10-01",
+)
+@click.option(
+    "--end-date",
+    "end_date",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    required=True,
+    help="end of the date range (inclusive), e.g. 2023-10-31",
+)
+def list_cc_txns_in_date_range(start_date, end_date):
+    # txn dates are tz-aware (DEFAULT_TZ), so the query bounds must be
+    # made tz-aware too before they can be compared
+    startDate = start_date.replace(tzinfo=DEFAULT_TZ)
+    endDate = end_date.replace(tzinfo=DEFAULT_TZ)
+
+    txns = smsParser.getCcTxnsInDateRange(startDate, endDate)
+    click.echo(
+        f"Found {len(txns)} HBL CC transactions between {start_date.date()} and {end_date.date()}:"
+    )
+    click.echo(
+        "\n".join(
+            f"{index}: {txn}" for index, txn in enumerate(txns, start=1)
+        )
+    )
+
+    totalAmount = smsParser.sumCcTxnAmountsInDateRange(startDate, endDate)
+    click.echo(f"Total CC spending in the date range: {totalAmount:.2f}")
 
 
 #
-# monthlyTotals["2023_12"] -> {"PKR": 0.00, "CAD": 0.00, "USD": 0.00}
+# monthlyTotals[(2023, 12)] -> {"pkr": 0.00, "cad": 0.00, "usd": 0.00}
 #
-def _updateMonthlyTotals(txn: CreditCardTxnDC, monthlyTotals: dict) -> None:
-    monthKey = txn.date.strftime("%Y_%m")
-    currencyKey = txn.amountTuple.currency.lower()
+def _newMonthlyTotals() -> dict:
+    return {
+        Currency.CAD.value.lower(): 0.00,
+        Currency.PKR.value.lower(): 0.00,
+        Currency.USD.value.lower(): 0.00
+    }
 
-    if monthKey in monthlyTotals:
-        monthlyTotals[monthKey][currencyKey] += txn.amountTuple.amount
-    else:
-        monthlyTotals[monthKey] = {
-            Currency.CAD.value.lower(): 0.00,
-            Currency.PKR.value.lower(): 0.00,
-            Currency.USD.value.lower(): 0.00
-        }
 
-        monthlyTotals[monthKey][currencyKey] += txn.amountTuple.amount
+def _updateMonthlyTotals(
+    txn: CreditCardTxnDC, monthKey: tuple, monthlyTotals: dict
+) -> None:
+    # monthlyTotals is a defaultdict, so unseen months are initialized
+    # with zeroed currency slots on first access -- no if/else branch
+    monthlyTotals[monthKey][txn.amountTuple.currency.lower()] += txn.amountTuple.amount
 
 
 @cli.command()
 def monthly_cc_spending_summary():
     txnsPerMonth = defaultdict(int)
-    monthlySpendingTotals = {}
+    monthlySpendingTotals = defaultdict(_newMonthlyTotals)
 
     # TODO:
     #   1) Parameterize this so that a year & month argument can be
     #      passed in via the CLI (eg "March 2023"), and all the txns for
     #      that month only should be summed up.
+    # collect the per-txn debug output and emit it in one write at the
+    # end instead of two print calls (and flushes) per txn
+    debugLines = []
     for txn in smsParser.ccTxns:
+        # the (year, month) key is precomputed on the txn at
+        # construction time
+        monthKey = txn.monthKey
         # TODO: move the following line to a verbose-enabled check
-        print(f"{txn} => {txn.date.strftime("%Y_%m")}")
-        monthKey = txn.date.strftime("%Y_%m")
+        debugLines.append(f"{txn} => {monthKey}")
         txnsPerMonth[monthKey] += 1
 
-        _updateMonthlyTotals(txn, monthlySpendingTotals)
-        print()
+        _updateMonthlyTotals(txn, monthKey, monthlySpendingTotals)
 
+    print("\n".join(debugLines))
     print()
     print("Month-wise CC spending summary:")
-    pprint.pprint(monthlySpendingTotals, indent=2, width=20, compact=True)
+    # plain dict for display, so pprint doesn't show the defaultdict
+    # wrapper/factory
+    pprint.pprint(dict(monthlySpendingTotals), indent=2, width=20, compact=True)
 
 
 # TODO:
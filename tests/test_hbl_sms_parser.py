@@ -1,8 +1,11 @@
 import unittest
 import xml
 import xml.etree.ElementTree as ET
+from datetime import datetime
 from parser.hbl_sms_parser import HBLSmsParser
 
+from common import DEFAULT_TZ
+
 
 class TestHBLSmsParser(unittest.TestCase):
 
@@ -93,6 +96,157 @@ class TestHBLSmsParser(unittest.TestCase):
 
         self.assertFalse(parser.isMsgCreditCardTxn(sms))
 
+    def test_extractDetailsFromTxnMsg_valid(self):
+        """Test method to verify that all txn details are correctly
+        extracted from a valid HBL CC Txn sms msg by the
+        HBLSmsParser.extractDetailsFromTxnMsg() utility method.
+        """
+        body = "Dear Customer, Your HBL CreditCard (ending with 8526) has been charged at IMTIAZ SUPER MARKET for PKR-25,170.49 on 01/Oct/2023."
+        sms = self._create_dummy_hbl_sms_msg(body)
+
+        ccTxn = HBLSmsParser.extractDetailsFromTxnMsg(sms)
+
+        self.assertIsNotNone(ccTxn)
+        self.assertEqual(ccTxn.ccLastFourDigits, 8526)
+        self.assertEqual(ccTxn.vendor, "IMTIAZ SUPER MARKET")
+        self.assertEqual(ccTxn.amountTuple.currency, "PKR")
+        self.assertEqual(ccTxn.amountTuple.amount, 25170.49)
+        self.assertEqual(
+            ccTxn.date, datetime(2023, 10, 1, tzinfo=DEFAULT_TZ)
+        )
+        self.assertIsNotNone(ccTxn.date.tzinfo)
+
+    def test_extractDetailsFromTxnBody_vendor_containing_for(self):
+        """Test method to verify that a vendor name containing the
+        " for " separator does not confuse the txn details extraction.
+        """
+        body = "Dear Customer, Your HBL CreditCard (ending with 8526) has been charged at EAT for TREAT CAFE for PKR-1,500.00 on 19/Sep/2023."
+
+        ccTxn = HBLSmsParser.extractDetailsFromTxnBody(body)
+
+        self.assertIsNotNone(ccTxn)
+        self.assertEqual(ccTxn.vendor, "EAT for TREAT CAFE")
+        self.assertEqual(ccTxn.amountTuple.amount, 1500.00)
+
+    def test_extractDetailsFromTxnBody_unanchored_body(self):
+        """Test method to verify that a msg body that merely *contains*
+        the CC txn template (rather than starting with it) is rejected.
+        """
+        body = "FWD: Dear Customer, Your HBL CreditCard (ending with 8526) has been charged at IMTIAZ SUPER MARKET for PKR-25,170.49 on 01/Oct/2023."
+
+        self.assertIsNone(HBLSmsParser.extractDetailsFromTxnBody(body))
+
+    def test_extractDetailsFromTxnBody_missing_separator(self):
+        """Test method to verify that a msg body missing one of the
+        template's literal separators is rejected.
+        """
+        body = "Dear Customer, Your HBL CreditCard (ending with 8526) was charged at IMTIAZ SUPER MARKET for PKR-25,170.49 on 01/Oct/2023."
+
+        self.assertIsNone(HBLSmsParser.extractDetailsFromTxnBody(body))
+
+    def test_extractDetailsFromTxnBody_bad_last4digits(self):
+        """Test method to verify that a msg body with a non-numeric CC
+        last-4-digits field is rejected.
+        """
+        body = "Dear Customer, Your HBL CreditCard (ending with 85XY) has been charged at IMTIAZ SUPER MARKET for PKR-25,170.49 on 01/Oct/2023."
+
+        self.assertIsNone(HBLSmsParser.extractDetailsFromTxnBody(body))
+
+    def test_extractDetailsFromTxnBody_bad_amount(self):
+        """Test method to verify that a msg body with an unparseable
+        txn amount is rejected.
+        """
+        body = "Dear Customer, Your HBL CreditCard (ending with 8526) has been charged at IMTIAZ SUPER MARKET for PKR-25,17O.49 on 01/Oct/2023."
+
+        self.assertIsNone(HBLSmsParser.extractDetailsFromTxnBody(body))
+
+    def test_extractDetailsFromTxnBody_zero_amount(self):
+        """Test method to verify that a msg body with a zero txn amount
+        is rejected.
+        """
+        body = "Dear Customer, Your HBL CreditCard (ending with 8526) has been charged at IMTIAZ SUPER MARKET for PKR-0.00 on 01/Oct/2023."
+
+        self.assertIsNone(HBLSmsParser.extractDetailsFromTxnBody(body))
+
+    def test_extractDetailsFromTxnBody_bad_date(self):
+        """Test method to verify that a msg body with an unparseable
+        txn date is rejected.
+        """
+        body = "Dear Customer, Your HBL CreditCard (ending with 8526) has been charged at IMTIAZ SUPER MARKET for PKR-25,170.49 on 2023-10-01."
+
+        self.assertIsNone(HBLSmsParser.extractDetailsFromTxnBody(body))
+
+    def test_parseAmountCents_valid(self):
+        """Test method to verify that valid txn amount strings are
+        parsed into exact integer cents by the
+        HBLSmsParser._parseAmountCents() utility method.
+        """
+        self.assertEqual(HBLSmsParser._parseAmountCents("25,170.49"), 2517049)
+        self.assertEqual(HBLSmsParser._parseAmountCents("1,234.56"), 123456)
+        self.assertEqual(HBLSmsParser._parseAmountCents("1,234"), 123400)
+        self.assertEqual(HBLSmsParser._parseAmountCents("1,234,567.89"), 123456789)
+        self.assertEqual(HBLSmsParser._parseAmountCents("123"), 12300)
+        self.assertEqual(HBLSmsParser._parseAmountCents("0.50"), 50)
+        # an ungrouped whole number is accepted: grouping is only
+        # enforced once a thousands separator appears
+        self.assertEqual(HBLSmsParser._parseAmountCents("1234.00"), 123400)
+
+    def test_parseAmountCents_invalid(self):
+        """Test method to verify that malformed txn amount strings are
+        rejected (with a ValueError) by the
+        HBLSmsParser._parseAmountCents() utility method.
+        """
+        invalidAmounts = [
+            "",
+            "abc",
+            "25,17O.49",
+            "1,2,3.45",
+            "12,34.56",
+            "1,,234",
+            "1,234,56.78",
+            "1,234.5",
+            "1,234.567",
+            "1,234.56.78",
+            "1,234.",
+            "1,",
+            ".50",
+        ]
+        for strValue in invalidAmounts:
+            with self.assertRaises(ValueError, msg=strValue):
+                HBLSmsParser._parseAmountCents(strValue)
+
+    def test_convertToDateTime_valid(self):
+        """Test method to verify that a valid HBL txn date string is
+        parsed into a tz-aware datetime by the
+        HBLSmsParser._convertToDateTime() utility method.
+        """
+        datetimeObj = HBLSmsParser._convertToDateTime("19/Sep/2023")
+
+        self.assertEqual(datetimeObj, datetime(2023, 9, 19, tzinfo=DEFAULT_TZ))
+        self.assertIsNotNone(datetimeObj.tzinfo)
+
+    def test_convertToDateTime_strptime_fallback(self):
+        """Test method to verify that txn date strings off the sliced
+        fast path's exact dd/Mon/yyyy shape (single-digit day,
+        uppercased month) still parse via the strptime fallback, with
+        the same tzinfo attached.
+        """
+        datetimeObj = HBLSmsParser._convertToDateTime("1/Oct/2023")
+        self.assertEqual(datetimeObj, datetime(2023, 10, 1, tzinfo=DEFAULT_TZ))
+
+        datetimeObj = HBLSmsParser._convertToDateTime("19/SEP/2023")
+        self.assertEqual(datetimeObj, datetime(2023, 9, 19, tzinfo=DEFAULT_TZ))
+        self.assertIsNotNone(datetimeObj.tzinfo)
+
+    def test_convertToDateTime_invalid(self):
+        """Test method to verify that invalid txn date strings are
+        rejected by the HBLSmsParser._convertToDateTime() utility method.
+        """
+        self.assertIsNone(HBLSmsParser._convertToDateTime("2023-09-19"))
+        self.assertIsNone(HBLSmsParser._convertToDateTime("32/Sep/2023"))
+        self.assertIsNone(HBLSmsParser._convertToDateTime("19/Sep/20231"))
+        self.assertIsNone(HBLSmsParser._convertToDateTime(""))
+
 
 if __name__ == "__main__":
     # to run this script:
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+from common import DEFAULT_TZ
+from sms_backup_file_parser import SmsBackupFileParser
+
+
+class TestSmsBackupFileParser(unittest.TestCase):
+
+    # (vendor, amount, txn date) triples for the dummy backup file,
+    # deliberately NOT in chronological order: parseMessages() is
+    # expected to sort the txns before building the query indexes
+    CC_TXNS = [
+        ("ALPHA STORE", "1,000.00", "05/Oct/2023"),
+        ("BETA MART", "2,500.50", "01/Oct/2023"),
+        ("GAMMA CAFE", "500.00", "10/Oct/2023"),
+    ]
+
+    def _createDummyBackupFile(self) -> str:
+        root = ET.Element("smses", count=str(len(self.CC_TXNS)))
+        for index, (vendor, amount, txnDate) in enumerate(self.CC_TXNS):
+            sms = ET.SubElement(root, "sms")
+            sms.set("address", "4250")
+            sms.set("date", str(1696265826791 + index))
+            sms.set(
+                "body",
+                f"Dear Customer, Your HBL CreditCard (ending with 8526) has been charged at {vendor} for PKR-{amount} on {txnDate}.",
+            )
+
+        fd, filepath = tempfile.mkstemp(suffix=".xml")
+        with os.fdopen(fd, "wb") as backupFile:
+            ET.ElementTree(root).write(backupFile, encoding="utf-8")
+
+        return filepath
+
+    def setUp(self):
+        self._backupFilepath = self._createDummyBackupFile()
+        self.parser = SmsBackupFileParser()
+        self.parser.loadFromSmsBackupFile(self._backupFilepath)
+        self.parser.parseMessages()
+
+    def tearDown(self):
+        os.remove(self._backupFilepath)
+
+    def test_txns_sorted_after_parse(self):
+        """Test method to verify that parseMessages() sorts the parsed
+        CC txns chronologically even when the backup file is not in
+        date order.
+        """
+        self.assertEqual(len(self.parser.ccTxns), 3)
+        self.assertEqual(
+            self.parser.ccTxnDates, sorted(self.parser.ccTxnDates)
+        )
+        self.assertEqual(self.parser.ccTxns[0].vendor, "BETA MART")
+        self.assertEqual(self.parser.ccTxns[-1].vendor, "GAMMA CAFE")
+
+    def test_getCcTxnsInDateRange_inclusive_bounds(self):
+        """Test method to verify that getCcTxnsInDateRange() includes
+        txns falling exactly on the start and end dates.
+        """
+        startDate = datetime(2023, 10, 1, tzinfo=DEFAULT_TZ)
+        endDate = datetime(2023, 10, 5, tzinfo=DEFAULT_TZ)
+
+        txns = self.parser.getCcTxnsInDateRange(startDate, endDate)
+
+        self.assertEqual(
+            [txn.vendor for txn in txns], ["BETA MART", "ALPHA STORE"]
+        )
+
+        allTxns = self.parser.getCcTxnsInDateRange(
+            startDate, datetime(2023, 10, 10, tzinfo=DEFAULT_TZ)
+        )
+        self.assertEqual(len(allTxns), 3)
+
+    def test_getCcTxnsInDateRange_empty_range(self):
+        """Test method to verify that getCcTxnsInDateRange() returns an
+        empty list for a date range containing no txns.
+        """
+        txns = self.parser.getCcTxnsInDateRange(
+            datetime(2023, 11, 1, tzinfo=DEFAULT_TZ),
+            datetime(2023, 11, 30, tzinfo=DEFAULT_TZ),
+        )
+
+        self.assertEqual(txns, [])
+
+    def test_sumCcTxnAmountsInDateRange(self):
+        """Test method to verify that sumCcTxnAmountsInDateRange() sums
+        exactly the txn amounts within the (inclusive) date range.
+        """
+        totalAmount = self.parser.sumCcTxnAmountsInDateRange(
+            datetime(2023, 10, 1, tzinfo=DEFAULT_TZ),
+            datetime(2023, 10, 5, tzinfo=DEFAULT_TZ),
+        )
+        self.assertAlmostEqual(totalAmount, 3500.50)
+
+        emptyTotal = self.parser.sumCcTxnAmountsInDateRange(
+            datetime(2023, 11, 1, tzinfo=DEFAULT_TZ),
+            datetime(2023, 11, 30, tzinfo=DEFAULT_TZ),
+        )
+        self.assertEqual(emptyTotal, 0)
+
+
+if __name__ == "__main__":
+    # to run this script:
+    #   cd /path/to/src sub-directory
+    #   python -m unittest discover -s ..\tests\ -v
+    #
+    unittest.main()